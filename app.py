@@ -1,9 +1,15 @@
 import os
+import sys
 import csv
-import io
 import re
+import json
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from operator import attrgetter
 from typing import List, Dict, Optional, Tuple
-from flask import Flask, request, render_template, jsonify, make_response, redirect, url_for
+from flask import Flask, Response, request, render_template, jsonify, redirect, url_for
 from dataclasses import dataclass
 import logging
 
@@ -21,14 +27,31 @@ if os.environ.get("RENDER"):
 else:
     app.config['DEBUG'] = True
 
-@dataclass
+# Precompiled patterns used by the bid data parsers
+# Table format header: "Seniority" (or the "Senority" misspelling) plus "Crew" or "Id"
+_TABLE_HEADER_SEN_RE = re.compile(r'seni?ority', re.IGNORECASE)
+_TABLE_HEADER_ID_RE = re.compile(r'crew|id', re.IGNORECASE)
+# Space-separated table row: SENIORITY CREW_ID BID_NUMBERS...; the seniority is
+# checked by int() so signed values parse as they always have
+_TABLE_ROW_RE = re.compile(r'(\S+)\s+(\S+)\s+(.+)')
+# Bid summary employee line: NAME ID# SEN BASE EQP STA BID_NUMBERS (CPT and F/O).
+# NAME starts and ends on a non-space so a long run of spaces after it cannot
+# trigger quadratic backtracking.
+_SUMMARY_EMPLOYEE_RE = re.compile(r'^([A-Z,](?:[A-Z\s,]*[A-Z,])?)\s+(\d{7})\s+(\d+)\s+(?:[A-Z]{2,4})\s+(?:[A-Z0-9]{2,4})\s+(?:[A-Z/]{2,3})\s+(.*)')
+# Bid numbers on a continuation line, which may be run together with other text
+_DIGITS_RE = re.compile(r'\d+')
+# Shortest stripped line the employee pattern can match ("A 1234567 1 AA AA AA 1"),
+# checked before running the regex so short noise lines are skipped cheaply
+_MIN_EMPLOYEE_LINE_LENGTH = 22
+
+@dataclass(slots=True)
 class BidItem:
     bid_position: int  # This represents the seniority number
     employee_id: str
     preferences: List[int]
     employee_name: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class BidResult:
     bid_position: int
     employee_id: str
@@ -36,138 +59,78 @@ class BidResult:
     choice_position: Optional[int] = None  # 1st choice, 2nd choice, etc.
     message: Optional[str] = None
     employee_name: Optional[str] = None
-    
-    def to_dict(self):
-        return {
-            "bid_position": self.bid_position,
-            "employee_id": self.employee_id,
-            "employee_name": self.employee_name,
-            "awarded_line": self.awarded_line,
-            "choice_position": self.choice_position,
-            "message": self.message
-        }
 
-def extract_current_employee(data: str) -> Tuple[Optional[dict], str]:
+# Result fields sent to the client in the columnar results payload
+_RESULT_FIELDS = ("bid_position", "employee_id", "employee_name", "awarded_line", "choice_position", "message")
+_result_values = attrgetter(*_RESULT_FIELDS)
+# Compact encoder for the results payload, built once; the payload only holds
+# lists of plain values, so the circular-reference check can be skipped
+_results_encoder = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+# Recently serialized results, keyed by a digest of the bid data so the cache
+# does not keep the pasted text itself alive
+_RESULTS_CACHE_SIZE = 32
+_results_cache: "OrderedDict[bytes, Optional[str]]" = OrderedDict()
+_results_cache_lock = threading.Lock()
+
+def _parse_preferences(tokens: List[str]) -> List[int]:
+    """Convert bid number tokens to ints, ignoring any non-numeric tokens."""
+    return list(map(int, filter(str.isdigit, tokens)))
+
+def _first_nonblank(lines: List[str]) -> int:
+    """Return the index of the first non-blank line, or len(lines) if there is none."""
+    return next((i for i, line in enumerate(lines) if line and not line.isspace()), len(lines))
+
+def parse_bid_data(lines: List[str]) -> Tuple[List[BidItem], Optional[BidItem]]:
     """
-    Extract the current employee information and return the rest of the data for table parsing.
-    In the new format, the current employee is the last entry.
+    Parse the raw bid data lines into a structured format.
+    In the bid summary format, the current employee is the last entry.
     
-    Returns a tuple: (current_employee_data, remaining_text)
+    Returns a tuple: (bid_items, current_employee)
     """
-    lines = data.strip().split('\n')
-    
-    if not lines:
-        return None, data
-    
-    # Check for old format first: "NAME SEN: NUMBER"
-    first_line = lines[0].strip()
-    sen_match = re.search(r'Sen:\s*(\d+)', first_line, re.IGNORECASE)
-    
-    if sen_match:
-        # Old format processing
-        seniority = int(sen_match.group(1))
-        name_part = first_line[:sen_match.start()].strip()
-        employee_id = ""
-        
-        if len(lines) > 1:
-            prefs_line = lines[1].strip()
-            try:
-                preferences = [int(p) for p in prefs_line.split()]
-            except ValueError:
-                logger.warning(f"Could not parse preferences for current employee: {prefs_line}")
-                return None, data
-            
-            current_employee = {
-                "name": name_part,
-                "seniority": seniority,
-                "employee_id": employee_id,
-                "preferences": preferences
-            }
-            
-            remaining_text = '\n'.join(lines[2:] if len(lines) > 2 else "")
-            return current_employee, remaining_text
-    
-    # New format: current employee is at the bottom, find the last valid employee entry
-    # Look for lines that match the pattern: NAME ID# SEN BASE EQP STA BID_NUMBERS
-    employee_lines = []
-    current_employee_data = None
-    
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if not line or "ONLY PILOTS" in line or "NAME" in line and "ID#" in line:
-            continue
-            
-        # Check if this line starts a new employee entry (either no indentation or specific pattern)
-        if not line.startswith("      ") and re.match(r'^[A-Z]', line):
-            # This could be an employee line
-            match = re.match(r'^([A-Z\s,]+?)\s+(\d{7})\s+(\d+)\s+([A-Z]{3})\s+(\d{3})\s+([A-Z]{3})\s+([\d\s]+)', line)
-            if match:
-                name = match.group(1).strip()
-                employee_id = match.group(2)
-                seniority = int(match.group(3))
-                bid_numbers_str = match.group(7)
-                
-                # Collect all bid numbers for this employee (including continuation lines)
-                all_bid_numbers = bid_numbers_str
-                j = i + 1
-                while j < len(lines) and lines[j].strip().startswith("      ") and not re.match(r'^[A-Z]', lines[j].strip()):
-                    continuation_line = lines[j].strip()
-                    # Extract numbers from continuation line
-                    numbers_only = re.findall(r'\d+', continuation_line)
-                    if numbers_only:
-                        all_bid_numbers += " " + " ".join(numbers_only)
-                    j += 1
-                
-                try:
-                    preferences = [int(p) for p in all_bid_numbers.split() if p.isdigit()]
-                    current_employee_data = {
-                        "name": name,
-                        "seniority": seniority,
-                        "employee_id": employee_id,
-                        "preferences": preferences
-                    }
-                except ValueError:
-                    continue
-    
-    if current_employee_data:
-        # Return the current employee (last one found) and all the data for processing
-        return current_employee_data, data
-    
-    return None, data
-    
-def parse_bid_data(data: str) -> List[BidItem]:
-    """Parse the raw bid data into a structured format."""
-    lines = data.strip().split('\n')
     bid_items = []
+    add_item = bid_items.append
+    current_employee = None
     
     # Check if this is the old table format (header with "Seniority" or "Senority")
-    first_line = lines[0].strip() if lines else ""
-    is_old_table_format = ("seniority" in first_line.lower() or "senority" in first_line.lower()) and ("crew" in first_line.lower() or "id" in first_line.lower())
+    start = _first_nonblank(lines)
+    first_line = lines[start].strip() if start < len(lines) else ""
+    is_old_table_format = bool(_TABLE_HEADER_SEN_RE.search(first_line) and _TABLE_HEADER_ID_RE.search(first_line))
     
 
     
     if is_old_table_format:
         # Handle old table format (Seniority, Crew Id, Bids)
+        # Bind the row matcher once; it runs for every line of the table
+        match_row = _TABLE_ROW_RE.match
+        
         # Skip the header line
-        for line_num, line in enumerate(lines[1:], 2):
+        for line_num, line in enumerate(lines[start + 1:], start + 2):
             line = line.strip()
             if not line:  # Skip empty lines
                 continue
                 
-            parts = line.split('\t') if '\t' in line else line.split()
-            if len(parts) < 3:
-                logger.warning(f"Line {line_num} has insufficient data: {line}")
+            if '\t' in line:
+                # Tab-separated cells; a Crew Id cell may itself contain spaces
+                row = line.split('\t', 2)
+                if len(row) < 3:
+                    row = None
+            else:
+                match = match_row(line)
+                row = match.groups() if match else None
+            if not row:
+                logger.warning(f"Line {line_num} is not a valid bid row: {line}")
                 continue
                 
             try:
-                seniority = int(parts[0])
-                employee_id = parts[1]
+                seniority_text, employee_id, bid_text = row
+                seniority = int(seniority_text)
+                employee_id = sys.intern(employee_id)
                 
-                # Parse bid numbers from remaining parts
-                bid_text = ' '.join(parts[2:])
-                preferences = [int(p) for p in bid_text.split() if p.isdigit()]
+                # Parse bid numbers from the rest of the row
+                preferences = _parse_preferences(bid_text.split())
                 
-                bid_items.append(BidItem(
+                add_item(BidItem(
                     bid_position=seniority,
                     employee_id=employee_id,
                     preferences=preferences
@@ -179,71 +142,72 @@ def parse_bid_data(data: str) -> List[BidItem]:
 
     
     else:
-        # Handle new format - parse all employees from the structured data
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
+        # Handle new format - parse all employees from the structured data in
+        # a single pass. An employee line may be followed directly by
+        # continuation lines holding the rest of that employee's bid numbers.
+        employees = []  # (name, employee_id, seniority, bid number tokens)
+        bid_tokens = None  # tokens of the employee whose bids are still being read
+        
+        # Bind the per-line regex methods and list append once instead of
+        # looking them up on every line
+        match_employee = _SUMMARY_EMPLOYEE_RE.match
+        find_digits = _DIGITS_RE.findall
+        add_employee = employees.append
+        
+        for raw_line in lines:
+            line = raw_line.strip()
             
-            # Skip empty lines and header lines
+            # Skip empty lines and header lines; both end the current employee's bids
             if not line or "ONLY PILOTS" in line or ("NAME" in line and "ID#" in line and "SEN" in line):
-                i += 1
+                bid_tokens = None
                 continue
             
+            # A line of numbers right after an employee line continues their bids
+            if bid_tokens is not None and line[:1].isdigit():
+                bid_tokens.extend(find_digits(line))
+                continue
+            
+            bid_tokens = None
+            
             # Check if this line is an employee entry
             # Pattern: NAME ID# SEN BASE EQP STA BID_NUMBERS
-            if not line.startswith("      ") and re.match(r'^[A-Z]', line):
-                # Pattern: NAME ID# SEN BASE EQP STA BID_NUMBERS
-                # Updated to handle both CPT and F/O positions
-                match = re.match(r'^([A-Z\s,]+?)\s+(\d{7})\s+(\d+)\s+([A-Z]{2,4})\s+([A-Z0-9]{2,4})\s+([A-Z/]{2,3})\s+(.*)', line)
+            # Updated to handle both CPT and F/O positions
+            if "A" <= line[:1] <= "Z" and len(line) >= _MIN_EMPLOYEE_LINE_LENGTH:
+                match = match_employee(line)
                 if match:
-                    name = match.group(1).strip()
-                    employee_id = match.group(2)
-                    seniority = int(match.group(3))
-                    bid_numbers_str = match.group(7).strip() if len(match.groups()) >= 7 else ""
-                    
-                    # Collect all bid numbers for this employee (including continuation lines)
-                    all_bid_numbers = bid_numbers_str
-                    j = i + 1
-                    
-                    # Look for continuation lines (indented lines with numbers)
-                    while j < len(lines):
-                        next_line = lines[j].strip()
-                        if next_line.startswith("      ") and not re.match(r'^[A-Z]', next_line):
-                            # This is a continuation line with more bid numbers
-                            numbers_only = re.findall(r'\d+', next_line)
-                            if numbers_only:
-                                all_bid_numbers += " " + " ".join(numbers_only)
-                            j += 1
-                        else:
-                            break
-                    
-                    try:
-                        preferences = [int(p) for p in all_bid_numbers.split() if p.isdigit()]
-                        bid_items.append(BidItem(
-                            bid_position=seniority,
-                            employee_id=employee_id,
-                            preferences=preferences,
-                            employee_name=name
-                        ))
-                    except ValueError as e:
-                        logger.warning(f"Error parsing employee {name}: {e}")
-                    
-                    # Move to the next line after this employee's data
-                    i = j
-                else:
-                    i += 1
-            else:
-                i += 1
+                    bid_tokens = match.group(4).split()
+                    add_employee((
+                        sys.intern(match.group(1)),
+                        sys.intern(match.group(2)),
+                        int(match.group(3)),
+                        bid_tokens
+                    ))
+        
+        for name, employee_id, seniority, tokens in employees:
+            try:
+                add_item(BidItem(
+                    bid_position=seniority,
+                    employee_id=employee_id,
+                    preferences=_parse_preferences(tokens),
+                    employee_name=name
+                ))
+            except ValueError as e:
+                logger.warning(f"Error parsing employee {name}: {e}")
+        
+        # The pasted summary ends with the current employee's own entry
+        if bid_items:
+            current_employee = bid_items[-1]
     
-    return bid_items
+    return bid_items, current_employee
 
 def assign_lines(bid_items: List[BidItem]) -> List[BidResult]:
     """Assign lines based on seniority and preferences."""
     # Sort by bid position (lowest number = highest seniority)
-    sorted_bids = sorted(bid_items, key=lambda x: x.bid_position)
+    sorted_bids = sorted(bid_items, key=attrgetter("bid_position"))
 
     
-    # Track assigned lines
+    # Track assigned lines; line numbers come straight from user input, so
+    # they are unbounded and a set is the only safe container
     assigned_lines = set()
     results = []
     
@@ -255,27 +219,81 @@ def assign_lines(bid_items: List[BidItem]) -> List[BidResult]:
         )
         
         # Try to assign a line from preferences
-        assigned = False
-        for choice_idx, preference in enumerate(bid.preferences):
+        for choice_position, preference in enumerate(bid.preferences, 1):
             if preference not in assigned_lines:
                 assigned_lines.add(preference)
                 result.awarded_line = preference
-                result.choice_position = choice_idx + 1  # 1st choice, 2nd choice, etc.
-                assigned = True
+                result.choice_position = choice_position  # 1st choice, 2nd choice, etc.
                 break
-                
-        if not assigned:
+        else:
             result.message = "No preferred lines available"
 
-            
         results.append(result)
         
     return results
 
+def _compute_results(bid_data: str) -> Optional[str]:
+    """
+    Parse the bid data, assign lines and return the serialized results,
+    or None if no bids could be parsed.
+    """
+    bid_items, current_employee = parse_bid_data(bid_data.splitlines())
+    
+    if not bid_items:
+        return None
+        
+    # Assign lines based on seniority and preferences
+    results = assign_lines(bid_items)
+    
+    # Send the results column by column so no per-row dict is built
+    columns = zip(*map(_result_values, results))
+    payload = {
+        "results": dict(zip(_RESULT_FIELDS, columns)),
+        "current_employee_id": current_employee.employee_id if current_employee else None
+    }
+    return _results_encoder.encode(payload)
+
+def _process_bid_data(bid_data: str) -> Optional[str]:
+    """
+    Return _compute_results for the bid data, reusing the stored result when
+    the same bid data was processed recently.
+    """
+    key = hashlib.blake2b(bid_data.encode(), digest_size=16).digest()
+    
+    with _results_cache_lock:
+        if key in _results_cache:
+            _results_cache.move_to_end(key)
+            return _results_cache[key]
+    
+    results_json = _compute_results(bid_data)
+    
+    with _results_cache_lock:
+        _results_cache[key] = results_json
+        if len(_results_cache) > _RESULTS_CACHE_SIZE:
+            _results_cache.popitem(last=False)
+    
+    return results_json
+
+@functools.cache
+def _render_home() -> Tuple[bytes, str]:
+    """Render the home page once and return its body with an ETag for it."""
+    body = render_template("index.html").encode()
+    return body, hashlib.md5(body, usedforsecurity=False).hexdigest()
+
 @app.route("/", methods=["GET"])
 def get_home():
     """Render the home page."""
-    return render_template("index.html")
+    # Re-render on every request while developing so template edits show up
+    if app.debug:
+        return render_template("index.html")
+    
+    # The page has no request-specific content, so serve the cached render
+    body, etag = _render_home()
+    response = Response(body, mimetype="text/html")
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    return response.make_conditional(request)
 
 @app.route("/process-bids", methods=["POST"])
 def process_bids():
@@ -287,18 +305,15 @@ def process_bids():
         if not bid_data.strip():
             return jsonify({"error": "Please enter bid data to process"}), 400
             
-        bid_items = parse_bid_data(bid_data)
+        results_json = _process_bid_data(bid_data)
         
-        if not bid_items:
+        if results_json is None:
             return jsonify({
                 "error": "Could not process the bid data. Please check your input format against the example provided. " +
                          "Make sure your data starts with your name and seniority number, followed by your bid preferences."
             }), 400
             
-        # Assign lines based on seniority and preferences
-        results = assign_lines(bid_items)
-        
-        return jsonify({"results": [result.to_dict() for result in results]})
+        return Response(results_json, mimetype="application/json")
     except Exception as e:
         logger.error(f"Error processing bids: {e}")
         error_message = str(e)
@@ -312,43 +327,57 @@ def process_bids():
             
         return jsonify({"error": user_message}), 500
 
+class _CSVRowBuffer:
+    """File-like target for csv.writer that returns each row instead of storing it."""
+    def write(self, value: str) -> str:
+        return value
+
 @app.route("/download-csv", methods=["POST"])
 def download_csv():
     """Download results as CSV."""
     try:
-        import json
         results_data = request.form.get("results_data", "")
         results = json.loads(results_data)
+        if not isinstance(results, list):
+            raise ValueError("Results data must be a list of results")
         
-        # Create a CSV in memory
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(["Seniority #", "Employee ID", "Employee Name", "Awarded Line", "Choice Position", "Message"])
-        
-        # Write data
+        # Check every row before streaming starts so bad data still gets a JSON error
         for result in results:
-            # Format choice position for CSV
-            choice_position = result.get("choice_position", "")
-            if not choice_position and result.get("message") and "No preferred lines available" in result.get("message"):
-                choice_position = "Insufficient Bids"
-                
-            writer.writerow([
-                result.get("bid_position", ""),
-                result.get("employee_id", ""),
-                result.get("employee_name", ""),
-                result.get("awarded_line", ""),
-                choice_position,
-                result.get("message", "")
-            ])
+            if not isinstance(result, dict):
+                raise ValueError("Each result must be an object")
+            message = result.get("message")
+            if message and not isinstance(message, str):
+                raise ValueError("Each result message must be text")
+        
+        def generate():
+            writer = csv.writer(_CSVRowBuffer())
             
-        # Create response with CSV file
-        output.seek(0)
-        response = make_response(output.getvalue())
-        response.headers["Content-Disposition"] = "attachment; filename=bid_results.csv"
-        response.headers["Content-type"] = "text/csv"
-        return response
+            # Write header
+            yield writer.writerow(["Seniority #", "Employee ID", "Employee Name", "Awarded Line", "Choice Position", "Message"])
+            
+            # Write data one row at a time
+            for result in results:
+                # Format choice position for CSV
+                choice_position = result.get("choice_position", "")
+                message = result.get("message", "")
+                if not choice_position and message and "No preferred lines available" in message:
+                    choice_position = "Insufficient Bids"
+                    
+                yield writer.writerow([
+                    result.get("bid_position", ""),
+                    result.get("employee_id", ""),
+                    result.get("employee_name", ""),
+                    result.get("awarded_line", ""),
+                    choice_position,
+                    message
+                ])
+            
+        # Stream the CSV file instead of building it in memory
+        return Response(
+            generate(),
+            content_type="text/csv",
+            headers={"Content-Disposition": "attachment; filename=bid_results.csv"}
+        )
     except Exception as e:
         logger.error(f"Error generating CSV: {e}")
         return jsonify({"error": str(e)}), 500
@@ -58,6 +58,8 @@ document.addEventListener('DOMContentLoaded', () => {
 
     // Store the results for downloading
     let currentResults = [];
+    // Employee ID of the person who pasted the bid summary, if known
+    let currentEmployeeId = null;
     
     // Mobile/touch device detection
     const isTouchDevice = ('ontouchstart' in window) || (navigator.maxTouchPoints > 0);
@@ -103,7 +105,8 @@ document.addEventListener('DOMContentLoaded', () => {
             
             // Parse the response
             const data = await response.json();
-            currentResults = data.results;
+            currentResults = rowsFromColumns(data.results);
+            currentEmployeeId = data.current_employee_id;
             
             // Display the results
             displayResults(currentResults);
@@ -149,6 +152,7 @@ document.addEventListener('DOMContentLoaded', () => {
         // Clear results
         resultsContainer.innerHTML = '<p class="text-center text-secondary py-5">No results to display yet. Submit bid data to see results here.</p>';
         currentResults = [];
+        currentEmployeeId = null;
         
         // Disable download button
         downloadBtn.disabled = true;
@@ -157,6 +161,23 @@ document.addEventListener('DOMContentLoaded', () => {
         errorAlert.classList.add('d-none');
     });
 
+    // Rebuild one result object per row from the column-oriented response
+    function rowsFromColumns(columns) {
+        const fields = Object.keys(columns);
+        const count = fields.length > 0 ? columns[fields[0]].length : 0;
+        const rows = [];
+        
+        for (let i = 0; i < count; i++) {
+            const row = {};
+            fields.forEach(field => {
+                row[field] = columns[field][i];
+            });
+            rows.push(row);
+        }
+        
+        return rows;
+    }
+
     // Function to display results in a table
     function displayResults(results) {
         if (!results || results.length === 0) {
@@ -182,20 +203,15 @@ document.addEventListener('DOMContentLoaded', () => {
         `;
         
         // Add rows for each result
-        results.forEach((result, index) => {
+        results.forEach(result => {
             const statusClass = result.awarded_line ? 'text-success' : 'text-danger';
             const statusIcon = result.awarded_line 
                 ? '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" fill="currentColor" class="bi bi-check-circle-fill" viewBox="0 0 16 16"><path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zm-3.97-3.03a.75.75 0 0 0-1.08.022L7.477 9.417 5.384 7.323a.75.75 0 0 0-1.06 1.06L6.97 11.03a.75.75 0 0 0 1.079-.02l3.992-4.99a.75.75 0 0 0-.01-1.05z"/></svg>' 
                 : '<svg xmlns="http://www.w3.org/2000/svg" width="20" height="20" fill="currentColor" class="bi bi-x-circle-fill" viewBox="0 0 16 16"><path d="M16 8A8 8 0 1 1 0 8a8 8 0 0 1 16 0zM5.354 4.646a.5.5 0 1 0-.708.708L7.293 8l-2.647 2.646a.5.5 0 0 0 .708.708L8 8.707l2.646 2.647a.5.5 0 0 0 .708-.708L8.707 8l2.647-2.646a.5.5 0 0 0-.708-.708L8 7.293 5.354 4.646z"/></svg>';
             const statusMessage = '';
             
-            // Check if this is the last employee (for new data format highlighting)
-            const isLastEmployee = index === results.length - 1;
-            // Also check if this employee has a name (for backward compatibility with old highlighting logic)
-            const hasEmployeeName = result.employee_name != null && result.employee_name !== '';
-            
-            // Highlight the last employee in new data format, or employees with names in general
-            const rowClass = (isLastEmployee && hasEmployeeName) ? 'table-primary' : '';
+            // Highlight the current employee's row (bid summary format only)
+            const rowClass = (currentEmployeeId !== null && result.employee_id === currentEmployeeId) ? 'table-primary' : '';
             
             // For the current employee, show the actual seniority number
             const displaySeniorityNumber = result.bid_position;